@@ -6,5 +6,5 @@ warnings.filterwarnings("ignore", message=".*pkg_resources.*", category=UserWarn
 Google Toolbox
 """
 
-from google_toolbox.core import GoogleEnv, AuthMethodClass, DriveScopes
+from google_toolbox.core import GoogleEnv, AuthMethodClass, DriveScopes, get_google_env
 from google_toolbox.gdrive import GoogleDrive
\ No newline at end of file
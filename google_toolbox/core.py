@@ -1,23 +1,24 @@
 
 import os
 import json
+import logging
+from functools import lru_cache
 from dataclasses import dataclass, field
 from typing import Optional, Literal
-from collections import OrderedDict
 
 from enum import Enum
 
-from dotenv import dotenv_values
-
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials as OAuthCredentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-
-import gspread
 
 from google_toolbox.gdrive import GoogleDrive
 
+logger = logging.getLogger(__name__)
+
+# gspread, dotenv and the OAuth browser flow are imported lazily inside
+# the methods that need them: they are off the service-account hot path
+# and their import cost lands on Cloud Run cold starts otherwise
+
 
 class AuthMethodClass(Enum):
     """Authentication method for Google services."""
@@ -36,13 +37,12 @@ def get_env_vars(filepath: str = None) -> dict:
     otherwise returns the environment variables from the OS.
     """
     if filepath and os.path.exists(filepath):
+        from dotenv import dotenv_values
         return dotenv_values(filepath)
-    
-    # Return environment variables from the OS sorted alphabetically
-    env_dict = OrderedDict()
-    for key in sorted(os.environ.keys()):
-        env_dict[key] = os.environ[key]
-    return env_dict
+
+    # Return environment variables from the OS sorted alphabetically.
+    # Plain dicts keep insertion order, so OrderedDict was pure overhead
+    return dict(sorted(os.environ.items()))
 
 
 @dataclass
@@ -75,6 +75,10 @@ class GoogleEnv:
     creds_with_scope: service_account.Credentials = field(init=False, default=None)
 
     def __post_init__(self):
+        # Memoized service instances (see drive_service / sheets_client)
+        self._drive_services = {}
+        self._gspread_client = None
+
         # Ensure oauth_token is a dict if passed as string
         if self.oauth_token and isinstance(self.oauth_token, str):
             try:
@@ -155,13 +159,14 @@ class GoogleEnv:
                 creds = OAuthCredentials.from_authorized_user_file(token_path, list(self.scopes))
             except ValueError as e:
                 # Token file is corrupted or missing required fields (like refresh_token)
-                print(f"Invalid cached token, will re-authenticate: {e}")
+                logger.warning("Invalid cached token, will re-authenticate: %s", e)
                 os.remove(token_path)
                 creds = None
         
         # If no valid credentials, run the OAuth flow
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
                 creds.refresh(Request())
             else:
                 # Need to run OAuth flow with client credentials file
@@ -170,6 +175,7 @@ class GoogleEnv:
                         "OAuth requires a client credentials JSON file. "
                         "Provide 'json_credentials' parameter with path to your OAuth client file."
                     )
+                from google_auth_oauthlib.flow import InstalledAppFlow
                 flow = InstalledAppFlow.from_client_secrets_file(
                     self.json_credentials, 
                     scopes=list(self.scopes)
@@ -185,16 +191,55 @@ class GoogleEnv:
         self.credentials = creds
         self.creds_with_scope = creds
     
-    def sheets_client(self) -> gspread.Client:
-        """Get authorized gspread client for Google Sheets."""
-        return gspread.authorize(self.creds_with_scope)
+    def sheets_client(self) -> "gspread.Client":
+        """Get authorized gspread client for Google Sheets.
+
+        The client is built once per GoogleEnv and reused afterwards.
+        """
+        if self._gspread_client is None:
+            import gspread
+            self._gspread_client = gspread.authorize(self.creds_with_scope)
+        return self._gspread_client
 
     def drive_service(self, main_folder_id: Optional[str] = None) -> GoogleDrive:
-        """Get GoogleDrive service instance."""
-        return GoogleDrive(
-            credentials = self.creds_with_scope,
-            main_folder_id = main_folder_id
-        )
+        """Get GoogleDrive service instance.
+
+        Instances are memoized per folder so repeated calls reuse the
+        already-built Drive client instead of paying discovery again.
+        """
+        if main_folder_id not in self._drive_services:
+            self._drive_services[main_folder_id] = GoogleDrive(
+                credentials = self.creds_with_scope,
+                main_folder_id = main_folder_id
+            )
+        return self._drive_services[main_folder_id]
+
+
+@lru_cache(maxsize=4)
+def get_google_env(
+    auth_method: AuthMethod | AuthMethodClass = "service_account",
+    env_path: Optional[str] = None,
+    json_credentials: Optional[str] = None,
+    env_var_name: str = 'GOOGLE_CREDENTIALS',
+    oauth_token: Optional[str] = None) -> GoogleEnv:
+    """Get a process-wide, memoized GoogleEnv.
+
+    Credential parsing and the OAuth token exchange cost ~150 ms, so a
+    warm Cloud Run container should do them once per configuration and
+    reuse the credentials (which refresh themselves on expiry) instead
+    of rebuilding a GoogleEnv per request.
+
+    Args:
+        oauth_token: OAuth token as a JSON string (kept as a string so
+            the arguments stay hashable for the cache)
+    """
+    return GoogleEnv(
+        auth_method = auth_method,
+        env_path = env_path,
+        json_credentials = json_credentials,
+        env_var_name = env_var_name,
+        oauth_token = oauth_token
+    )
 
 
 # Create default instance (will fail if GOOGLE env var not set - catch at import time if needed)
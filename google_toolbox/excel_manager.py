@@ -0,0 +1,502 @@
+"""
+Streaming Excel helpers for Google Drive workbooks.
+
+openpyxl's default mode parses the whole workbook into memory and
+reserializes it on save, which is the dominant cost when a sheet only
+grows by a row per call. These helpers keep reads in `read_only` mode
+(headers and row count only) and route every pure-write path through
+`write_only` mode so rows stream straight to the output buffer.
+"""
+
+import csv
+import logging
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from io import BytesIO, StringIO
+from tempfile import SpooledTemporaryFile, gettempdir
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from openpyxl import Workbook, load_workbook
+
+try:
+    # ~2.5x faster than openpyxl for write-once sheets
+    from pyexcelerate import Workbook as FastWorkbook
+except ImportError:
+    FastWorkbook = None
+
+try:
+    # Second choice: streams rows with constant memory, still well
+    # ahead of openpyxl
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from pandas import DataFrame as pd_DataFrame
+
+logger = logging.getLogger(__name__)
+
+
+def read_headers(buffer: BytesIO) -> tuple[list, int]:
+    """
+    Read only the header row and row count from an xlsx buffer.
+
+    Opens the workbook with `read_only=True, data_only=True` so openpyxl
+    streams the sheet XML instead of building the full DOM.
+
+    Args:
+        buffer: BytesIO with the xlsx content
+
+    Returns:
+        Tuple of (headers list, max_row)
+    """
+    buffer.seek(0)
+    workbook = load_workbook(buffer, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.active
+        headers = []
+        for row in worksheet.iter_rows(max_row=1, values_only=True):
+            headers = list(row)
+            break
+
+        max_row = worksheet.max_row
+        if max_row is None:
+            # Workbooks written in write_only mode omit the dimension
+            # record; count rows by streaming, still without a DOM
+            max_row = sum(1 for _ in worksheet.iter_rows(values_only=True))
+        return headers, max_row
+    finally:
+        workbook.close()
+
+
+def write_rows_stream(
+    headers: list,
+    rows: list,
+    sheet_name: Optional[str] = None):
+    """
+    Build a fresh workbook for the pure-write path.
+
+    Writer preference: pyexcelerate (skips openpyxl's style and
+    validation layers entirely), then xlsxwriter in constant_memory
+    mode (rows stream out as they are written, holding one row in
+    memory), then openpyxl's `write_only` mode.
+
+    Args:
+        headers: Header row values
+        rows: Iterable of row value lists
+        sheet_name: Optional sheet title
+
+    Returns:
+        Seekable binary buffer with the serialized xlsx; in-memory up
+        to 4 MB, spilled to a temp file beyond that
+    """
+    buffer = SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+
+    if FastWorkbook is not None:
+        workbook = FastWorkbook()
+        workbook.new_sheet(
+            sheet_name or "Sheet1",
+            data=[headers] + [list(row) for row in rows]
+        )
+        workbook.save(buffer)
+    elif xlsxwriter is not None:
+        # No in_memory here: it silently disables constant_memory.
+        # Row spill goes to temp files under /tmp (writable on Cloud
+        # Run) while the workbook itself streams into the buffer
+        workbook = xlsxwriter.Workbook(
+            buffer,
+            {'constant_memory': True, 'tmpdir': gettempdir()}
+        )
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, headers)
+        for row_index, row in enumerate(rows, start=1):
+            worksheet.write_row(row_index, 0, row)
+        workbook.close()
+    else:
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(title=sheet_name)
+
+        worksheet.append(headers)
+        for row in rows:
+            worksheet.append(row)
+
+        workbook.save(buffer)
+
+    buffer.seek(0)
+    return buffer
+
+
+@dataclass
+class SheetState:
+    """Cached header row and append position for a Drive workbook."""
+    file_id: str
+    headers: tuple
+    next_row: int
+    modified_time: Optional[str] = None
+
+
+# Per-instance cache: a warm Cloud Run container serves a stream of
+# events for the same workbook, so headers/row count rarely change
+_sheet_states: dict = {}
+
+
+def get_sheet_state(file_id: str, drive_service) -> SheetState:
+    """
+    Get the header row and next append row for a workbook, cached.
+
+    Validates the cached state against the file's `modifiedTime` (one
+    cheap metadata call) and only re-downloads and re-reads the sheet
+    when someone else touched the file.
+
+    Args:
+        file_id: Drive file ID of the workbook
+        drive_service: GoogleDrive instance
+
+    Returns:
+        SheetState for the workbook
+    """
+    modified_time = drive_service.get_file_metadata(
+        file_id,
+        fields='modifiedTime'
+    ).get('modifiedTime')
+
+    state = _sheet_states.get(file_id)
+    if state is not None and state.modified_time == modified_time:
+        return state
+
+    buffer = drive_service.download_file(file_id)
+    headers, max_row = sniff_headers_and_rowcount(buffer)
+    state = SheetState(
+        file_id=file_id,
+        headers=tuple(headers),
+        next_row=max_row + 1,
+        modified_time=modified_time
+    )
+    _sheet_states[file_id] = state
+    return state
+
+
+def advance_sheet_state(file_id: str, modified_time: Optional[str] = None) -> None:
+    """
+    Record one appended row after a successful upload.
+
+    Args:
+        file_id: Drive file ID of the workbook
+        modified_time: New `modifiedTime` reported by the upload, if known
+    """
+    state = _sheet_states.get(file_id)
+    if state is not None:
+        state.next_row += 1
+        state.modified_time = modified_time
+
+
+def append_row_csv(
+    flat_data: dict,
+    file_id: str,
+    drive_service,
+    file_name: Optional[str] = None) -> Optional[str]:
+    """
+    Append one flattened record to a CSV file on Drive.
+
+    The CSV is the append-only source of truth: the row is spliced onto
+    the downloaded bytes without parsing them, so the per-call cost is a
+    single download/upload round-trip instead of an openpyxl
+    parse-and-reserialize of the whole workbook.
+
+    Args:
+        flat_data: Flattened record (keys become the header on first write)
+        file_id: Drive file ID of the CSV
+        drive_service: GoogleDrive instance
+        file_name: Drive name for the CSV (e.g. "plan_sales.csv");
+            required when file_id is empty and the file must be created
+
+    Returns:
+        File ID if successful, None otherwise
+    """
+    headers = list(flat_data.keys())
+
+    existing = b""
+    if file_id:
+        buffer = drive_service.download_file(file_id)
+        if buffer:
+            existing = buffer.getvalue()
+
+    line_buffer = StringIO()
+    writer = csv.writer(line_buffer)
+    if not existing:
+        writer.writerow(headers)
+    else:
+        # Reuse the stored header order so columns stay aligned
+        stored_headers = next(csv.reader(StringIO(
+            existing.split(b"\n", 1)[0].decode('utf-8')
+        )))
+        headers = stored_headers
+        if not existing.endswith(b"\n"):
+            existing += b"\n"
+    writer.writerow([flat_data.get(header, "") for header in headers])
+
+    out_buffer = BytesIO(existing + line_buffer.getvalue().encode('utf-8'))
+
+    if file_id:
+        success = drive_service.update_file_from_buffer(
+            file_id,
+            out_buffer,
+            mimetype='text/csv'
+        )
+        return file_id if success else None
+
+    # A nameless file could never be re-found by name (rebuild_xlsx
+    # locates the CSV that way), so refuse to create one
+    if not file_name:
+        logger.error("file_name is required to create the CSV on Drive")
+        return None
+
+    return drive_service.upload_buffer(
+        out_buffer,
+        file_name,
+        mimetype='text/csv'
+    )
+
+
+def rebuild_xlsx(
+    csv_file_id: str,
+    xlsx_file_id: str,
+    drive_service,
+    sheet_name: Optional[str] = None) -> bool:
+    """
+    Regenerate the xlsx from the append-only CSV source of truth.
+
+    Meant to run on a schedule or on demand, so the webhook hot path
+    never pays the xlsx serialization cost.
+
+    Args:
+        csv_file_id: Drive file ID of the CSV source
+        xlsx_file_id: Drive file ID of the xlsx to overwrite
+        drive_service: GoogleDrive instance
+        sheet_name: Optional sheet title
+
+    Returns:
+        True if successful, False otherwise
+    """
+    buffer = drive_service.download_file(csv_file_id)
+    if buffer is None:
+        return False
+
+    rows = list(csv.reader(StringIO(buffer.getvalue().decode('utf-8'))))
+    if not rows:
+        return False
+
+    xlsx_buffer = write_rows_stream(
+        headers=rows[0],
+        rows=rows[1:],
+        sheet_name=sheet_name
+    )
+    return drive_service.update_file_from_buffer(
+        xlsx_file_id,
+        xlsx_buffer,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+_SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def sniff_headers_and_rowcount(buffer: BytesIO) -> tuple[list, int]:
+    """
+    Read the header row and row count straight from the sheet XML.
+
+    Streams `xl/worksheets/sheet1.xml` out of the zip with iterparse,
+    clearing each `<row>` element after counting it, so memory stays
+    O(header width) and openpyxl never gets involved. Shared-string
+    header cells are resolved with a second streaming pass over
+    `xl/sharedStrings.xml` that only keeps the needed entries.
+
+    Args:
+        buffer: BytesIO with the xlsx content
+
+    Returns:
+        Tuple of (headers list, row count)
+    """
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as archive:
+        sheet_path = sorted(
+            name for name in archive.namelist()
+            if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", name)
+        )[0]
+
+        headers = []
+        shared_refs = {}
+        row_count = 0
+        with archive.open(sheet_path) as sheet:
+            for _, element in ET.iterparse(sheet):
+                if element.tag != f"{_SHEET_NS}row":
+                    continue
+                row_count += 1
+                if row_count == 1:
+                    for cell in element.iter(f"{_SHEET_NS}c"):
+                        if cell.get('t') == 's':
+                            # Shared string: store the index, resolve below
+                            index = int(cell.findtext(f"{_SHEET_NS}v"))
+                            shared_refs[len(headers)] = index
+                            headers.append(None)
+                        elif cell.get('t') == 'inlineStr':
+                            headers.append(
+                                cell.findtext(f"{_SHEET_NS}is/{_SHEET_NS}t")
+                            )
+                        else:
+                            headers.append(cell.findtext(f"{_SHEET_NS}v"))
+                element.clear()
+
+        if shared_refs:
+            wanted = set(shared_refs.values())
+            strings = {}
+            with archive.open('xl/sharedStrings.xml') as shared:
+                index = -1
+                for _, element in ET.iterparse(shared):
+                    if element.tag != f"{_SHEET_NS}si":
+                        continue
+                    index += 1
+                    if index in wanted:
+                        strings[index] = "".join(
+                            t.text or "" for t in element.iter(f"{_SHEET_NS}t")
+                        )
+                        if len(strings) == len(wanted):
+                            break
+                    element.clear()
+            for position, index in shared_refs.items():
+                headers[position] = strings.get(index)
+
+    return headers, row_count
+
+
+def build_row(headers, flat_data: dict) -> list:
+    """
+    Project a flattened record onto the header order in one pass.
+
+    Appending the resulting list in a single `ws.append(row)` (or
+    `append_row_raw`) call replaces the per-cell
+    `ws.cell(row=..., column=..., value=...)` pattern, which allocates a
+    Cell object and bounds-checks per call.
+    """
+    return [flat_data.get(header, "") for header in headers]
+
+
+def append_record(buffer: BytesIO, flat_data: dict, headers) -> BytesIO:
+    """
+    Append one flattened record to an xlsx buffer as a single batch row.
+
+    Args:
+        buffer: BytesIO with the xlsx content
+        flat_data: Flattened record
+        headers: Header order (e.g. from SheetState.headers)
+
+    Returns:
+        New BytesIO with the patched xlsx
+    """
+    return append_row_raw(buffer, build_row(headers, flat_data))
+
+
+def _column_letter(index: int) -> str:
+    """Convert a 1-based column index to its A1-style letter."""
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def append_row_raw(buffer: BytesIO, row_values: list, headers: Optional[list] = None) -> BytesIO:
+    """
+    Append one row to an xlsx buffer without opening it in openpyxl.
+
+    An xlsx is a zip whose sheet lives in `xl/worksheets/sheet1.xml`;
+    appending a row only needs a `<row>` fragment spliced in before
+    `</sheetData>`. Strings are written as inline strings so the shared
+    strings table never has to be touched.
+
+    Args:
+        buffer: BytesIO with the xlsx content
+        row_values: Cell values for the new row
+        headers: Optional header order; when given together with a dict
+            in `row_values`-style usage upstream, callers should already
+            have built the list with `[flat_data.get(h, "") for h in headers]`
+
+    Returns:
+        New BytesIO with the patched xlsx
+    """
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer, 'r') as source:
+        sheet_names = [
+            name for name in source.namelist()
+            if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", name)
+        ]
+        sheet_path = sorted(sheet_names)[0]
+        sheet_xml = source.read(sheet_path)
+
+        next_row = len(re.findall(rb"<row[ >]", sheet_xml)) + 1
+
+        cells = []
+        for col_idx, value in enumerate(row_values, 1):
+            ref = f"{_column_letter(col_idx)}{next_row}"
+            if isinstance(value, bool):
+                cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)):
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+            else:
+                cells.append(
+                    f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+                )
+        row_xml = f'<row r="{next_row}">{"".join(cells)}</row>'.encode('utf-8')
+
+        marker = sheet_xml.rfind(b"</sheetData>")
+        if marker != -1:
+            patched = sheet_xml[:marker] + row_xml + sheet_xml[marker:]
+        else:
+            # Empty sheet serialized as a self-closing tag
+            patched = sheet_xml.replace(
+                b"<sheetData/>",
+                b"<sheetData>" + row_xml + b"</sheetData>",
+                1
+            )
+
+        # Keep the dimension record honest for strict readers
+        patched = re.sub(
+            rb'<dimension ref="([A-Z]+\d+:[A-Z]+)\d+"/>',
+            b'<dimension ref="\\g<1>%d"/>' % next_row,
+            patched,
+            count=1
+        )
+
+        out_buffer = BytesIO()
+        with zipfile.ZipFile(out_buffer, 'w', zipfile.ZIP_DEFLATED) as target:
+            for entry in source.infolist():
+                if entry.filename == sheet_path:
+                    target.writestr(entry, patched)
+                else:
+                    target.writestr(entry, source.read(entry))
+
+    out_buffer.seek(0)
+    return out_buffer
+
+
+def df_to_excel_buffer(df: pd_DataFrame, sheet_name: Optional[str] = None):
+    """
+    Serialize a DataFrame to an xlsx buffer through the write-only path.
+
+    Faster than `df.to_excel(engine='openpyxl')`, which builds the full
+    in-memory workbook before saving.
+
+    Args:
+        df: DataFrame to serialize
+        sheet_name: Optional sheet title
+
+    Returns:
+        Seekable binary buffer with the serialized xlsx
+    """
+    return write_rows_stream(
+        headers=list(df.columns),
+        rows=df.itertuples(index=False, name=None),
+        sheet_name=sheet_name
+    )
@@ -24,12 +24,19 @@ class FileFormat:
 
 ParquetFormat = FileFormat(
     name="parquet",
-    mimetype="application/octet-stream",
+    mimetype="application/vnd.apache.parquet",
     extension="parquet",
     method_name="to_parquet",
     pd_kwargs={
         "index": False,
-        "engine": "pyarrow"
+        "engine": "pyarrow",
+        # zstd files come out 20-40% smaller than the snappy default at
+        # similar CPU cost, so uploads push fewer bytes over the wire
+        "compression": "zstd",
+        "compression_level": 3,
+        # Explicit: the duplicate check reads row-group min/max from
+        # the footer, so statistics must stay on for the main file
+        "write_statistics": True
     }
 )
 
@@ -6,10 +6,12 @@ PURPOSE: Helper functions for Wix Plan Sales data processing
 Author: Edward Toledo Lopez <edward_tl@hotmail.com>
 """
 
-from typing import Any
+import logging
+from typing import Any, Optional
 from pathlib import Path
+from collections import deque
+from sys import intern
 import json
-import pandas as pd
 
 from flask import (
     Response as FlaskResponse,
@@ -18,6 +20,80 @@ from flask import (
 
 from flask_responses import error_response
 
+# Same optional dependency as flask_responses: orjson parses and dumps
+# several times faster than the stdlib, and the config is (re)read on
+# every request
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Local cache of Drive IDs (file/folder lookups cost a files.list
+# round-trip each); survives warm Cloud Run invocations
+FILE_MANAGER_PATH = Path(__file__).parent / "file_manager.json"
+
+# Parsed config memoized across warm invocations; the mtime check keeps
+# it honest if something else rewrites the file
+_config_cache: Optional[dict] = None
+_config_mtime: Optional[float] = None
+
+
+def load_file_manager() -> dict:
+    """
+    Load the cached Drive IDs from file_manager.json.
+
+    On a warm container this is a stat() plus a dict copy: the parsed
+    config is cached at module scope and only re-read when the file's
+    mtime changes.
+
+    Returns:
+        Config dict, empty if the file does not exist yet
+    """
+    global _config_cache, _config_mtime
+
+    try:
+        mtime = FILE_MANAGER_PATH.stat().st_mtime
+    except OSError:
+        return {}
+
+    if _config_cache is None or mtime != _config_mtime:
+        try:
+            raw = FILE_MANAGER_PATH.read_bytes()
+            _config_cache = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            _config_mtime = mtime
+        except ValueError as e:
+            # Covers both orjson.JSONDecodeError and json.JSONDecodeError
+            logger.warning("Invalid file_manager.json, ignoring cache: %s", e)
+            return {}
+
+    # Copy so callers mutating their config never corrupt the cache
+    return dict(_config_cache)
+
+
+def save_file_manager(config: dict) -> None:
+    """
+    Persist the cached Drive IDs to file_manager.json.
+
+    No-op when the config matches what is already on disk: in the
+    steady state the IDs never change, so every webhook after the first
+    skips the write (and its fsync) entirely.
+    """
+    global _config_cache, _config_mtime
+
+    if _config_cache is not None and config == _config_cache:
+        logger.debug("Config unchanged, skipping file_manager.json write")
+        return
+
+    if orjson is not None:
+        FILE_MANAGER_PATH.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+    else:
+        FILE_MANAGER_PATH.write_text(json.dumps(config, indent=4))
+
+    _config_cache = dict(config)
+    _config_mtime = FILE_MANAGER_PATH.stat().st_mtime
+
 
 def is_valid_request(request: FlaskRequest) -> tuple[FlaskResponse, dict]:
     """
@@ -29,49 +105,193 @@ def is_valid_request(request: FlaskRequest) -> tuple[FlaskResponse, dict]:
             status=405
         )
 
-    # Parse JSON body
+    # Parse JSON body - straight from the raw bytes through orjson,
+    # skipping Flask's mimetype negotiation and stdlib-json path
+    data = None
     try:
-        data = request.get_json(silent=False)
+        raw = request.get_data()
+        if not raw:
+            raise ValueError("Empty request body")
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         if data is None:
             raise ValueError("Empty request body")
         return (None, data)
-        
+
     except Exception as e:
         bad_response = error_response(
             f"Invalid JSON: {str(e)}",
             status=400
         )
-    
+
     return (bad_response, data)
 
 def flat_dictionary(data: dict, prefix: str = "") -> dict:
     """
-    Recursively flattens a nested dictionary into a single-level dictionary.
-    
+    Flattens a nested dictionary into a single-level dictionary.
+
     Keys are created using underscore-separated format.
+
+    Walks the structure iteratively with a stack of (prefix, value)
+    pairs. Prefixes are extended once at push time, so a leaf's key is
+    already built when it pops - no per-leaf join over its whole key
+    path. Leaves accumulate in a flat list of (key, value) pairs - list
+    appends never rehash - and the result dict is built once at the
+    end, correctly sized in a single allocation.
+
+    Leaf keys are interned: every webhook produces the same ~40 key
+    strings, so after the first call lookups against the flattened dict
+    (and the DataFrame column index built from it) compare by pointer
+    instead of re-hashing fresh allocations.
     """
-    result = {}
-    
-    for key, value in data.items():
-        new_key = f"{prefix}_{key}" if prefix else key
-        
+    pairs = []
+    stack = deque([(prefix, data)])
+
+    while stack:
+        key, value = stack.pop()
+
         if isinstance(value, dict):
-            nested = flat_dictionary(value, new_key)
-            result.update(nested)
+            # Reversed so the LIFO pop keeps the original key order.
+            # Plain concatenation: no f-string format machinery per push
+            for sub_key, item in reversed(value.items()):
+                stack.append((key + "_" + sub_key if key else sub_key, item))
         elif isinstance(value, list):
-            if value and isinstance(value[0], dict):
-                for idx, item in enumerate(value):
-                    nested = flat_dictionary(item, f"{new_key}_{idx}")
-                    result.update(nested)
+            if not value:
+                pairs.append((intern(key), ""))
+            elif isinstance(value[0], dict):
+                for idx in reversed(range(len(value))):
+                    stack.append((key + "_" + str(idx) if key else str(idx), value[idx]))
+            elif type(value[0]) is str and all(type(v) is str for v in value):
+                # All-str lists (tags, labels) skip the str() round-trip
+                pairs.append((intern(key), ", ".join(value)))
             else:
-                result[new_key] = ", ".join(str(v) for v in value)
+                # List comprehension over a generator: join gets a
+                # sized list and skips per-element __next__ dispatch
+                pairs.append((intern(key), ", ".join([str(v) for v in value])))
         else:
-            result[new_key] = value
-            
-    return result
+            pairs.append((intern(key), value))
+
+    return dict(pairs)
+
+
+def _join_list(value: list) -> str:
+    """Render a scalar list the way flat_dictionary does."""
+    if not value:
+        return ""
+    if type(value[0]) is str and all(type(v) is str for v in value):
+        return ", ".join(value)
+    return ", ".join([str(v) for v in value])
+
+
+def compile_flattener(sample: dict):
+    """
+    Generate a flattener specialized to one payload shape.
 
+    Webhooks from the same source share a fixed schema, so the generic
+    walker re-discovers the same structure on every call. This builds,
+    from a sample payload, a straight-line function with one assignment
+    per leaf - no stack, no isinstance dispatch per node - and compiles
+    it with exec. Key strings are constants in the generated code, so
+    CPython interns them at compile time.
 
-def is_new_data(df: pd.DataFrame, new_data: dict, compare_col: str) -> bool:
+    The generated function is shape-checked: every node verifies its
+    type, every dict its key set and every list its length, and any
+    mismatch (a dict drifting to a scalar, a leaf growing children)
+    returns None so the caller can fall back to flat_dictionary.
+    Output is identical to flat_dictionary(sample-shaped payload).
+    """
+    lines = []
+    counter = [0]
+
+    def fresh() -> str:
+        counter[0] += 1
+        return f"v{counter[0]}"
+
+    def emit(expr: str, value: Any, key: str, depth: int) -> None:
+        pad = "    " * depth
+        if isinstance(value, dict):
+            name = fresh()
+            lines.append(f"{pad}{name} = {expr}")
+            lines.append(
+                f"{pad}if type({name}) is not dict"
+                f" or {name}.keys() != {set(value.keys())!r}: return None"
+            )
+            for sub_key, item in value.items():
+                emit(f"{name}[{sub_key!r}]", item,
+                     key + "_" + sub_key if key else sub_key, depth)
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            name = fresh()
+            lines.append(f"{pad}{name} = {expr}")
+            lines.append(
+                f"{pad}if type({name}) is not list"
+                f" or len({name}) != {len(value)}: return None"
+            )
+            for idx, item in enumerate(value):
+                emit(f"{name}[{idx}]", item,
+                     key + "_" + str(idx) if key else str(idx), depth)
+        elif isinstance(value, list):
+            name = fresh()
+            lines.append(f"{pad}{name} = {expr}")
+            lines.append(f"{pad}if type({name}) is not list: return None")
+            lines.append(f"{pad}out[{key!r}] = _join_list({name})")
+        else:
+            name = fresh()
+            lines.append(f"{pad}{name} = {expr}")
+            lines.append(f"{pad}if isinstance({name}, (dict, list)): return None")
+            lines.append(f"{pad}out[{key!r}] = {name}")
+
+    emit("data", sample, "", 1)
+    source = "def _flatten(data, _join_list=_join_list):\n"
+    source += "    out = {}\n"
+    source += "\n".join(lines) + "\n"
+    source += "    return out\n"
+
+    namespace = {"_join_list": _join_list}
+    exec(compile(source, "<flattener>", "exec"), namespace)  # pylint: disable=exec-used
+    return namespace["_flatten"]
+
+
+# Compiled flattener for the last payload shape seen; rebuilt whenever
+# the shape drifts
+_compiled_flattener = None
+
+
+def flatten_record(data: dict) -> dict:
+    """
+    Flatten a webhook payload, specializing to its shape over time.
+
+    The first call (and any call whose shape differs from the last one)
+    goes through the generic flat_dictionary walker and recompiles the
+    specialized flattener; steady-state calls run the straight-line
+    compiled version.
+    """
+    global _compiled_flattener
+
+    if _compiled_flattener is not None:
+        # Belt and braces on top of the emitted shape guards: a drifted
+        # payload must never cost more than a fallback to the generic
+        # walker
+        try:
+            flat = _compiled_flattener(data)
+        except (AttributeError, TypeError, KeyError, IndexError):
+            flat = None
+        if flat is not None:
+            return flat
+        logger.debug("Payload shape changed, recompiling flattener")
+
+    flat = flat_dictionary(data)
+    try:
+        _compiled_flattener = compile_flattener(data)
+    except (ValueError, SyntaxError) as e:
+        # A pathological payload (e.g. a key that breaks repr round-
+        # tripping) only costs us the specialization, not the request
+        logger.warning("Could not compile flattener: %s", e)
+        _compiled_flattener = None
+    return flat
+
+
+# Annotated as a string so importing helpers does not drag pandas in;
+# the function only touches DataFrame methods on the object it is given
+def is_new_data(df: "pd.DataFrame", new_data: dict, compare_col: str) -> bool:
     """
     Check if the new data is different from the last entry in the DataFrame.
     
@@ -91,22 +311,37 @@ def is_new_data(df: pd.DataFrame, new_data: dict, compare_col: str) -> bool:
     # Get the new timestamp value
     new_data_compare_value = new_data.get(compare_col)
     if not new_data_compare_value:
-        print("New data does not contain timestamp column")
+        logger.debug("New data does not contain timestamp column")
         return False
     
     # Check if timestamp column exists in DataFrame
     if compare_col not in df.columns:
-        print("Timestamp column does not exist in DataFrame")
+        logger.debug("Timestamp column does not exist in DataFrame")
         return False
-    
-    # Get last timestamp in DataFrame
-    last_data_compare_value = df[compare_col].iloc[-1]
-    
-    # Compare timestamps (assuming string format that can be compared)
-    print("Comparing timestamps:")
-    print("Last column:", last_data_compare_value)
-    print("New column:", new_data_compare_value)
 
-    # Return True if new data is different from last data
-    return str(new_data_compare_value) != str(last_data_compare_value)
+    # If the parquet round-trip turned the column into datetime64, an
+    # ISO-8601 string from the webhook would compare unequal everywhere
+    # and duplicates would slip through. Cast once, then compare at
+    # C level as datetimes
+    column = df[compare_col]
+    if column.dtype.kind == 'M' and isinstance(new_data_compare_value, str):
+        import pandas as pd
+        try:
+            new_data_compare_value = pd.Timestamp(new_data_compare_value)
+        except ValueError:
+            # Fail open: compare the raw string (matches nothing in a
+            # datetime column) - the worst case is a duplicate row,
+            # never a dropped sale
+            logger.debug("Compare value is not a parseable timestamp")
+
+    # Vectorized membership over the whole column instead of comparing
+    # only the last row: a webhook re-delivered out of order is caught
+    # too, and the eq loop runs in C rather than per-element Python
+    exists = column.eq(new_data_compare_value).any()
+    logger.debug(
+        "Compare value %s already present: %s",
+        new_data_compare_value, exists
+    )
+
+    return not exists
 
@@ -13,24 +13,26 @@ Author: Edward Toledo Lopez <edward_tl@hotmail.com>
 
 import os
 import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from pathlib import Path
+from tempfile import SpooledTemporaryFile
 
 from dotenv import load_dotenv
 
-import pandas as pd
 from functions_framework import http as functions_http
 from flask import (
     Response as FlaskResponse,
     Request as FlaskRequest
 )
 
-from google_toolbox import GoogleEnv
-
 from helpers import (
     is_valid_request,
-    flat_dictionary,
-    is_new_data
+    flatten_record,
+    is_new_data,
+    load_file_manager,
+    save_file_manager
 )
 
 from flask_responses import (
@@ -41,6 +43,82 @@ from flask_responses import (
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Compare-column values already stored, per parquet file. Wix retries
+# webhooks aggressively; on a warm container this rejects a duplicate
+# in microseconds, before any Drive I/O, and unlike a last-value-only
+# check it also catches retries arriving after other sales. Bounded
+# LRU so a long-lived container cannot grow without limit
+_SEEN_COMPARE_VALUES_MAX = 10_000
+_seen_compare_values = OrderedDict()
+
+
+def _compare_value_seen(dedup_key: str, value) -> bool:
+    """Check (and refresh) a compare value in the warm-dedup LRU."""
+    key = (dedup_key, str(value))
+    if key in _seen_compare_values:
+        _seen_compare_values.move_to_end(key)
+        return True
+    return False
+
+
+def _remember_compare_value(dedup_key: str, value) -> None:
+    """Record an uploaded compare value, evicting the oldest past cap."""
+    _seen_compare_values[(dedup_key, str(value))] = None
+    if len(_seen_compare_values) > _SEEN_COMPARE_VALUES_MAX:
+        _seen_compare_values.popitem(last=False)
+
+# Parquet bytes of the last version seen per file ID, keyed by Drive
+# modifiedTime. In the steady state this container wrote the current
+# version itself, so a webhook costs one metadata call instead of
+# re-downloading the whole history
+_parquet_bytes_cache = {}
+
+
+def _outside_parquet_stats(parquet_file, column_name: str, value) -> bool:
+    """
+    True when the parquet footer proves `value` is absent: every row
+    group carries statistics for the column and `value` falls outside
+    each one's [min, max]. False means "unknown" - stats missing or the
+    value is inside some range - so the caller must decode and check.
+    """
+    metadata = parquet_file.metadata
+    try:
+        column_index = parquet_file.schema_arrow.names.index(column_name)
+    except ValueError:
+        return False
+
+    for group_index in range(metadata.num_row_groups):
+        stats = metadata.row_group(group_index).column(column_index).statistics
+        if stats is None or not stats.has_min_max:
+            return False
+        try:
+            if stats.min <= value <= stats.max:
+                return False
+        except TypeError:
+            # Value type does not order against the stored min/max
+            return False
+    return True
+
+
+def _get_drive(folder_id: str):
+    """
+    Get the Drive client for a folder, built once per warm container.
+
+    get_google_env memoizes credentials per configuration and GoogleEnv
+    memoizes one GoogleDrive per folder, so repeat invocations reuse the
+    same client, transport pool and parsed credentials instead of
+    rebuilding them per request.
+    """
+    from google_toolbox import get_google_env
+
+    google_env = get_google_env(
+        auth_method = os.getenv("LOGIN_METHOD"),
+        oauth_token = os.getenv("GOOGLE_OAUTH_TOKEN")
+    )
+    return google_env.drive_service(main_folder_id=folder_id)
+
 @functions_http
 def load_to_drive(request: FlaskRequest) -> FlaskResponse:
     """
@@ -57,52 +135,73 @@ def load_to_drive(request: FlaskRequest) -> FlaskResponse:
     if bad_response is not None:
         return bad_response
 
+    # Heavyweight imports sit past validation so rejected requests
+    # (wrong method, bad JSON) never pay their cold-start cost; after
+    # the first accepted request they are sys.modules lookups
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
     # Load configuration
     try:
-        
+
         file_name = os.getenv("FILE_NAME")
         folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
         compare_column = os.getenv("PLAN_ORDER_ID")
-        parquet_file_id = os.getenv("PARQUET_FILE_ID")
-        excel_file_id = os.getenv("EXCEL_FILE_ID")
-
-        login_method = os.getenv("LOGIN_METHOD")
-        
-        # Try to get OAuth token from env
-        oauth_token_str = os.getenv("GOOGLE_OAUTH_TOKEN")
-        oauth_token = None
-        if oauth_token_str:
-            try:
-                oauth_token = json.loads(oauth_token_str)
-            except Exception as e:
-                print(f"Warning: Failed to parse GOOGLE_OAUTH_TOKEN: {e}")
 
+        # Cached IDs spare a files.list round-trip per missing env var
+        config = load_file_manager()
+        parquet_file_id = os.getenv("PARQUET_FILE_ID") or config.get("PARQUET_FILE_ID")
+        excel_file_id = os.getenv("EXCEL_FILE_ID") or config.get("EXCEL_FILE_ID")
+
+        # Parquet is the source of truth; the xlsx is for humans and can
+        # be regenerated off the hot path (EXCEL_ON_WEBHOOK=false)
+        excel_on_webhook = os.getenv(
+            "EXCEL_ON_WEBHOOK", "true"
+        ).lower() not in ("0", "false", "no")
+
+        # Partitioned mode: upload only the new record as a part file
+        # (O(row) per webhook) and let compact_dataset fold the parts
+        # into the canonical parquet off the hot path
+        parquet_partitioned = os.getenv(
+            "PARQUET_PARTITIONED", ""
+        ).lower() in ("1", "true", "yes")
 
     except Exception as e:
         return error_response(f"Failed to load config: {str(e)}")
-    
+
     # Validate folder ID
     if not folder_id:
         return error_response("GOOGLE_DRIVE_FOLDER_ID not configured in environment variables")
-    
-    # Initialize Google Drive
+
+    # Initialize Google Drive (memoized across warm invocations)
     try:
-        google_env = GoogleEnv(
-            auth_method = login_method,
-            oauth_token = oauth_token
-        )
-        drive = google_env.drive_service(main_folder_id=folder_id)
+        drive = _get_drive(folder_id)
     except Exception as e:
         return error_response(f"Failed to initialize Google Drive: {str(e)}")
     
     # Confirm the existence of the parquet_id:
-    if parquet_file_id == "":
-        print("Parquet file ID not configured in environment variables. Getting file ID from Google Drive...")
+    if not parquet_file_id:
+        logger.info("Parquet file ID not configured in environment variables. Getting file ID from Google Drive...")
         parquet_file_id = drive.get_file_id(f"{file_name}.parquet")
         excel_file_id = drive.get_file_id(f"{file_name}.xlsx")
+
+        config["PARQUET_FILE_ID"] = parquet_file_id
+        config["EXCEL_FILE_ID"] = excel_file_id
+        save_file_manager(config)
             
-    # Flatten the nested dictionary
-    flat_data = flat_dictionary(data.get('data', {}))
+    # Flatten the nested dictionary (specializes to the payload shape
+    # after the first webhook)
+    flat_data = flatten_record(data.get('data', {}))
+
+    # Cheap duplicate check: if this container already uploaded this
+    # compare value, skip the download/parse/upload cycle entirely
+    dedup_key = parquet_file_id or folder_id
+    new_compare_value = flat_data.get(compare_column) if compare_column else None
+    if new_compare_value is not None \
+        and _compare_value_seen(dedup_key, new_compare_value):
+        return skipped_response("Data already exists in file")
+
     info = {
         'flat_data': flat_data,
         'raw_data': data
@@ -119,72 +218,359 @@ def load_to_drive(request: FlaskRequest) -> FlaskResponse:
                 f"{file_name}_{reference}.json",
                 mimetype='application/json'
             )
-            print(f"JSON record uploaded: {file_name}.json")
+            logger.debug("JSON record uploaded: %s.json", file_name)
     except Exception as e:
-        print(f"Failed to upload JSON record: {e}")
+        logger.error("Failed to upload JSON record: %s", e)
             # Continue execution as this is just a record
 
+    # Partitioned hot path: no history download, no concat, no full
+    # rewrite - just one tiny part upload per webhook
+    if parquet_partitioned:
+        from parquet_parts import append_part
+
+        flat_data['request_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Dict-of-lists goes straight down the column constructor;
+        # DataFrame([dict]) would take the slower records path and
+        # re-infer the layout from a one-element list
+        df_new = pd.DataFrame({key: [value] for key, value in flat_data.items()})
+        part_id = append_part(drive, df_new, file_name, folder_id)
+        if part_id is None:
+            return error_response("Failed to upload parquet part")
+        if new_compare_value is not None:
+            _remember_compare_value(dedup_key, new_compare_value)
+        return success_response(
+            "Data added",
+            data={'parquet_part': part_id, 'rows': 1}
+        )
+
     # Step 1: Check if file exists
-    update_df = False
+    # The history stays an Arrow table end to end: reading skips the
+    # pandas conversion of every historic row, and appending one record
+    # with concat_tables shares the old buffers zero-copy instead of
+    # copying the whole frame like pd.concat
+    parquet_file = None
+    update_df = True
     if parquet_file_id:
-        # Step 2.a: File exists - download and check for new data
-        print("Downloading parquet file...")
+        # Step 2.a: File exists - download and check for new data.
+        # The duplicate check never decodes the whole file: the footer
+        # statistics can prove the value absent without touching any
+        # data pages, and otherwise only the compare column is decoded.
+        # The full read happens later, only when an append is due.
+        logger.debug("Downloading parquet file...")
         try:
-            buffer = drive.download_file(parquet_file_id)
+            # Revalidate the cached bytes with one lightweight files.get;
+            # only an actual change (or a cold cache) pays the download
+            modified_time = drive.get_file_metadata(
+                parquet_file_id, fields='modifiedTime'
+            ).get('modifiedTime')
+            cached = _parquet_bytes_cache.get(parquet_file_id)
+
+            if cached is not None and modified_time \
+                and cached[0] == modified_time:
+                logger.debug("Parquet cache hit (modifiedTime unchanged)")
+                buffer = BytesIO(cached[1])
+            else:
+                buffer = drive.download_file(parquet_file_id)
+                if buffer and modified_time:
+                    _parquet_bytes_cache[parquet_file_id] = (
+                        modified_time, buffer.getvalue()
+                    )
 
             if buffer:
-                df = pd.read_parquet(buffer)
-                print("Parquet file downloaded successfully")
-                update_df = is_new_data(
-                    df,
-                    flat_data,
-                    compare_col = compare_column
-                )
-                print("Data is new:", update_df)
+                parquet_file = pq.ParquetFile(buffer)
+                logger.debug("Parquet file downloaded successfully")
+                if _outside_parquet_stats(
+                    parquet_file, compare_column, new_compare_value):
+                    logger.debug("Footer statistics prove value is new")
+                else:
+                    # Only the compare column crosses into pandas
+                    compare_df = (
+                        parquet_file.read(columns=[compare_column]).to_pandas()
+                        if compare_column in parquet_file.schema_arrow.names
+                        else pd.DataFrame(index=range(parquet_file.metadata.num_rows))
+                    )
+                    update_df = is_new_data(
+                        compare_df,
+                        flat_data,
+                        compare_col = compare_column
+                    )
+                logger.debug("Data is new: %s", update_df)
             else:
                 # Download failed, treat as new file
-                print("Parquet file downloaded FAILED. Creating new file...")
-                df = pd.DataFrame()
-                update_df = True
+                logger.warning("Parquet file download FAILED. Creating new file...")
         except Exception as e:
             return error_response(f"Failed to download parquet: {str(e)}")
     else:
         # Step 2.b: File does not exist
-        print("Parquet file DOES NOT EXIST. Creating new file...")
-        df = pd.DataFrame()
-        update_df = True
-    
-    flat_data['request_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-    df_new = pd.DataFrame([flat_data])
-    
+        logger.info("Parquet file DOES NOT EXIST. Creating new file...")
+
     # Step 3.a: If update is not needed
     if not update_df:
         return skipped_response("Data already exists in file")
-    
-    # Step 3.b: Update DataFrame if needed
-    # Append new data
-    df = pd.concat([df, df_new], ignore_index=True)
-    print("Dataframe updated successfully. New shape:", df.shape)
-
-    # Step 4: Save and upload files from buffers
-    formats_ids = {
-        'parquet': parquet_file_id,
-        'excel': excel_file_id
-    }
-    
-    response = {
-        file_format: drive.upload_df_to_drive(
-            df = df,
-            file_name = file_name,
-            folder_id = folder_id,
-            file_format = file_format,
-            file_id = file_id
-        ) for file_format, file_id in formats_ids.items()
-    }
-            
-    response['rows'] = len(df)
+
+    # Step 3.b / Step 4: append the new record and serialize.
+    # zstd: 20-40% smaller than snappy at similar CPU cost, and upload
+    # bytes dominate the round-trip on Cloud Run
+    flat_data['request_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Spooled: stays a memory buffer up to 4 MB and spills to disk past
+    # that, so a large history rewrite cannot OOM a small Cloud Run
+    # instance; pyarrow writes and the Drive media upload both take the
+    # same file object
+    parquet_buffer = SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+    table = None
+
+    new_table = None
+    if parquet_file is not None \
+        and set(flat_data) <= set(parquet_file.schema_arrow.names):
+        # Steady state (no new payload fields): build the record against
+        # the stored schema so it can stream as its own row group. A
+        # leaf whose type drifted (e.g. an int where history holds
+        # strings) fails here - before anything touches the buffer -
+        # and drops to the permissive branch instead of erroring the
+        # webhook
+        schema = parquet_file.schema_arrow
+        try:
+            new_table = pa.Table.from_pylist([flat_data], schema=schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.debug("Payload types drifted from stored schema: %s", e)
+
+    if new_table is not None:
+        # Stream the existing row groups through a ParquetWriter and
+        # add the record as its own small row group. Peak memory is one
+        # row group instead of the whole history, and no concatenated
+        # intermediate table exists
+        with pq.ParquetWriter(
+            parquet_buffer, schema,
+            compression="zstd", compression_level=3) as writer:
+            for group_index in range(parquet_file.num_row_groups):
+                writer.write_table(parquet_file.read_row_group(group_index))
+            writer.write_table(new_table)
+        total_rows = parquet_file.metadata.num_rows + 1
+    else:
+        # First record, or schema/type drift: permissive promotion
+        # tolerates payload fields appearing, disappearing or changing
+        # type between webhooks (missing ones become null)
+        new_table = pa.Table.from_pylist([flat_data])
+        if parquet_file is not None:
+            history = parquet_file.read()
+            try:
+                table = pa.concat_tables(
+                    [history, new_table],
+                    promote_options="permissive"
+                )
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Strings and numbers cannot promote into each other;
+                # settle whichever side conflicts on string and retry.
+                # A number arriving for a string column is rendered as
+                # text; a string arriving for a numeric column casts
+                # the history column to string (what pd.concat's object
+                # promotion amounted to after serialization)
+                history_names = set(history.schema.names)
+                conformed = dict(flat_data)
+                for key, value in flat_data.items():
+                    if value is None or key not in history_names:
+                        continue
+                    stored_type = history.schema.field(key).type
+                    if pa.types.is_string(stored_type) \
+                        and not isinstance(value, str):
+                        conformed[key] = str(value)
+                    elif isinstance(value, str) \
+                        and not pa.types.is_string(stored_type):
+                        index = history.schema.get_field_index(key)
+                        history = history.set_column(
+                            index,
+                            pa.field(key, pa.string()),
+                            history.column(key).cast(pa.string())
+                        )
+                try:
+                    table = pa.concat_tables(
+                        [history, pa.Table.from_pylist([conformed])],
+                        promote_options="permissive"
+                    )
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    return error_response(
+                        f"Payload types cannot merge with stored schema: {e}"
+                    )
+        else:
+            table = new_table
+        pq.write_table(table, parquet_buffer, compression="zstd", compression_level=3)
+        total_rows = table.num_rows
+    logger.debug("Parquet history updated. Rows: %s", total_rows)
+
+    # Serialize everything before submitting, so the worker threads do
+    # pure Drive I/O and serialization errors surface here rather than
+    # inside a future
+    excel_buffer = None
+    if excel_on_webhook:
+        from google_toolbox.excel_manager import df_to_excel_buffer
+
+        # Excel writers want pandas; convert only for this branch. On
+        # the row-group append path no combined table exists, so decode
+        # a copy of the fresh parquet bytes (the upload thread shares
+        # parquet_buffer)
+        if table is not None:
+            excel_table = table
+        else:
+            parquet_buffer.seek(0)
+            excel_table = pq.read_table(BytesIO(parquet_buffer.read()))
+        excel_buffer = df_to_excel_buffer(excel_table.to_pandas())
+
+    def _upload_parquet():
+        uploaded_id = drive.upload_buffer(
+            parquet_buffer,
+            f"{file_name}.parquet",
+            file_id = parquet_file_id,
+            drive_folder_id = folder_id,
+            mimetype = drive.parquet_mimetype
+        )
+        if uploaded_id:
+            # Re-seed the cache with the bytes just written so the next
+            # webhook's revalidation hits
+            modified_time = drive.get_file_metadata(
+                uploaded_id, fields='modifiedTime'
+            ).get('modifiedTime')
+            if modified_time:
+                parquet_buffer.seek(0)
+                _parquet_bytes_cache[uploaded_id] = (
+                    modified_time, parquet_buffer.read()
+                )
+        return uploaded_id
+
+    def _upload_excel():
+        return drive.upload_buffer(
+            excel_buffer,
+            f"{file_name}.xlsx",
+            file_id = excel_file_id,
+            drive_folder_id = folder_id,
+            mimetype = drive.excel_mimetype
+        )
+
+    tasks = {'parquet': _upload_parquet}
+    if excel_on_webhook:
+        tasks['excel'] = _upload_excel
+
+    # Both uploads are independent Drive round-trips and GoogleDrive
+    # uses per-thread transports, so run them concurrently: wall time
+    # becomes max(parquet, excel) instead of the sum
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {
+            file_format: executor.submit(task)
+            for file_format, task in tasks.items()
+        }
+        response = {
+            file_format: future.result()
+            for file_format, future in futures.items()
+        }
+
+    response['rows'] = total_rows
+
+    # Only remember the value when the parquet upload actually landed -
+    # a failed upload must leave the retry free to go through
+    uploaded_parquet_id = response.get('parquet')
+    if new_compare_value is not None and uploaded_parquet_id:
+        _remember_compare_value(uploaded_parquet_id, new_compare_value)
+
+    # Remember IDs of files created by this upload. When the xlsx is
+    # skipped on the hot path it is now stale; the scheduled
+    # rebuild_excel run picks the dirty flag up
+    config["PARQUET_FILE_ID"] = response.get('parquet') or parquet_file_id
+    config["EXCEL_FILE_ID"] = response.get('excel') or excel_file_id
+    config["EXCEL_DIRTY"] = not excel_on_webhook
+    save_file_manager(config)
 
     return success_response(
         "Data added",
         data=response
-    )
\ No newline at end of file
+    )
+
+
+@functions_http
+def compact_dataset(request: FlaskRequest) -> FlaskResponse:
+    """
+    Scheduled entry point (e.g. nightly Cloud Scheduler POST) that folds
+    pending parquet part files into the canonical {FILE_NAME}.parquet.
+
+    Returns:
+        FlaskResponse with status and the canonical file ID
+    """
+    if request.method != 'POST':
+        return error_response("Method not allowed. Use POST.", status=405)
+
+    from parquet_parts import compact
+
+    file_name = os.getenv("FILE_NAME")
+    folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
+    if not folder_id:
+        return error_response("GOOGLE_DRIVE_FOLDER_ID not configured in environment variables")
+
+    config = load_file_manager()
+    parquet_file_id = os.getenv("PARQUET_FILE_ID") or config.get("PARQUET_FILE_ID")
+
+    try:
+        drive = _get_drive(folder_id)
+    except Exception as e:
+        return error_response(f"Failed to initialize Google Drive: {str(e)}")
+
+    canonical_id = compact(drive, file_name, folder_id, canonical_file_id=parquet_file_id)
+    if canonical_id is None:
+        return error_response("Compaction failed")
+
+    config["PARQUET_FILE_ID"] = canonical_id
+    save_file_manager(config)
+
+    return success_response("Dataset compacted", data={'parquet': canonical_id})
+
+
+@functions_http
+def rebuild_excel(request: FlaskRequest) -> FlaskResponse:
+    """
+    Scheduled entry point (e.g. Cloud Scheduler POST every N minutes)
+    that regenerates the xlsx from the canonical parquet when webhooks
+    have marked it stale (EXCEL_ON_WEBHOOK=false sets EXCEL_DIRTY).
+
+    Returns:
+        FlaskResponse with status and the excel file ID
+    """
+    if request.method != 'POST':
+        return error_response("Method not allowed. Use POST.", status=405)
+
+    import pyarrow.parquet as pq
+
+    file_name = os.getenv("FILE_NAME")
+    folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
+    if not folder_id:
+        return error_response("GOOGLE_DRIVE_FOLDER_ID not configured in environment variables")
+
+    config = load_file_manager()
+    if not config.get("EXCEL_DIRTY"):
+        return skipped_response("Excel is up to date")
+
+    parquet_file_id = os.getenv("PARQUET_FILE_ID") or config.get("PARQUET_FILE_ID")
+    excel_file_id = os.getenv("EXCEL_FILE_ID") or config.get("EXCEL_FILE_ID")
+    if not parquet_file_id:
+        return error_response("No parquet file to rebuild from")
+
+    try:
+        drive = _get_drive(folder_id)
+    except Exception as e:
+        return error_response(f"Failed to initialize Google Drive: {str(e)}")
+
+    buffer = drive.download_file(parquet_file_id)
+    if buffer is None:
+        return error_response("Failed to download parquet")
+
+    excel_id = drive.upload_df_to_drive(
+        df = pq.read_table(buffer).to_pandas(),
+        file_name = file_name,
+        folder_id = folder_id,
+        file_format = 'excel',
+        file_id = excel_file_id
+    )
+    if excel_id is None:
+        return error_response("Failed to upload excel")
+
+    config["EXCEL_FILE_ID"] = excel_id
+    config["EXCEL_DIRTY"] = False
+    save_file_manager(config)
+
+    return success_response("Excel rebuilt", data={'excel': excel_id})
\ No newline at end of file
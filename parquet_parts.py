@@ -0,0 +1,150 @@
+"""
+PARQUET PARTS FILE
+
+PURPOSE: Append-only partitioned Parquet dataset on Google Drive.
+         The single-file flow re-downloads and re-uploads the whole
+         history per webhook (O(N) each call); here the hot path only
+         uploads the new record as a tiny day-partitioned part file,
+         and a scheduled compaction pass folds the parts back into the
+         canonical {file_name}.parquet.
+
+Author: Edward Toledo Lopez <edward_tl@hotmail.com>
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+import pandas as pd
+
+from google_toolbox import GoogleDrive
+
+PARQUET_MIME = 'application/vnd.apache.parquet'
+
+
+def part_file_name(file_name: str, when: Optional[pd.Timestamp] = None) -> str:
+    """
+    Build a unique, day-partitioned part name.
+
+    e.g. "plan_sales.2026-08-29.3f9ac1d2.parquet"
+    """
+    day = (when or pd.Timestamp.now()).strftime('%Y-%m-%d')
+    return f"{file_name}.{day}.{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _is_part(item: dict, file_name: str) -> bool:
+    name = item.get('name', '')
+    return (
+        name.startswith(f"{file_name}.")
+        and name.endswith('.parquet')
+        and name != f"{file_name}.parquet"
+    )
+
+
+def append_part(
+    drive: GoogleDrive,
+    df_new: pd.DataFrame,
+    file_name: str,
+    dataset_folder_id: str) -> Optional[str]:
+    """
+    Upload the new record(s) as one small part file.
+
+    The payload is only the new rows, so the webhook cost stays flat
+    as history grows.
+
+    Returns:
+        Part file ID if successful, None otherwise
+    """
+    buffer = BytesIO()
+    # Parts hold a handful of rows at most: dictionary pages and column
+    # statistics are pure footer overhead at that size, and compaction
+    # rewrites everything with full-quality settings anyway
+    df_new.to_parquet(
+        buffer,
+        index=False,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=False,
+        write_statistics=False
+    )
+    return drive.upload_buffer(
+        buffer,
+        part_file_name(file_name),
+        drive_folder_id=dataset_folder_id,
+        mimetype=PARQUET_MIME
+    )
+
+
+def read_dataset(
+    drive: GoogleDrive,
+    file_name: str,
+    dataset_folder_id: str,
+    max_workers: int = 8) -> pd.DataFrame:
+    """
+    Read the whole dataset: canonical file plus any pending parts.
+
+    Parts are downloaded concurrently (GoogleDrive uses per-thread
+    transports) and concatenated in listing order.
+
+    Returns:
+        Combined DataFrame, empty if the dataset has no files yet
+    """
+    items = [
+        item for item in drive.list_folder(dataset_folder_id)
+        if item.get('name') == f"{file_name}.parquet" or _is_part(item, file_name)
+    ]
+    if not items:
+        return pd.DataFrame()
+
+    # Canonical file first so compacted history keeps its row order
+    items.sort(key=lambda item: (item['name'] != f"{file_name}.parquet", item['name']))
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        buffers = list(executor.map(
+            lambda item: drive.download_file(item['id']),
+            items
+        ))
+
+    frames = [pd.read_parquet(buffer) for buffer in buffers if buffer is not None]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def compact(
+    drive: GoogleDrive,
+    file_name: str,
+    dataset_folder_id: str,
+    canonical_file_id: Optional[str] = None) -> Optional[str]:
+    """
+    Fold pending part files into the canonical {file_name}.parquet.
+
+    Meant to run off the hot path (e.g. nightly via Cloud Scheduler).
+    Parts are deleted only after the rewritten canonical file uploads
+    successfully, so a failed run leaves the dataset readable.
+
+    Returns:
+        Canonical file ID if successful, None otherwise
+    """
+    part_items = [
+        item for item in drive.list_folder(dataset_folder_id)
+        if _is_part(item, file_name)
+    ]
+    if not part_items:
+        return canonical_file_id
+
+    df = read_dataset(drive, file_name, dataset_folder_id)
+
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False, compression="zstd", compression_level=3)
+    new_id = drive.upload_buffer(
+        buffer,
+        f"{file_name}.parquet",
+        file_id=canonical_file_id,
+        drive_folder_id=dataset_folder_id,
+        mimetype=PARQUET_MIME
+    )
+    if new_id:
+        drive.delete_files_batch([item['id'] for item in part_items])
+    return new_id